@@ -1,28 +1,33 @@
-from bs4 import BeautifulSoup
+from selectolax.lexbor import LexborHTMLParser
 import requests 
+from requests.adapters import HTTPAdapter
 
 
 url = 'https://www.scrapethissite.com/pages/forms/'
 
 
-page = requests.get(url)
+session = requests.Session()
+session.headers['Accept-Encoding'] = 'gzip, deflate'
+session.mount('https://', HTTPAdapter(pool_connections=10, pool_maxsize=10))
 
-soup = BeautifulSoup(page.text, 'html') 
+page = session.get(url, timeout=10)
 
-print(soup)
+tree = LexborHTMLParser(page.content) 
 
-soup.find('div')
+print(tree.html)
 
-soup.find_all('div')
+tree.css_first('div')
 
+tree.css('div')
 
-soup.find_all('p')
 
+tree.css('p')
 
-soup.find('p' , class_ = 'lead').text
 
+tree.css_first('p.lead').text()
 
-soup.find('p' , class_ = 'lead').text.strip()
 
+tree.css_first('p.lead').text(strip=True)
 
-soup.find('th').text.strip()
\ No newline at end of file
+
+tree.css_first('th').text(strip=True)
\ No newline at end of file
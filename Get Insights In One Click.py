@@ -6,14 +6,20 @@ Fully automated:
  - Prompts user for a custom formula
  - Applies formula to DataFrame
  - Saves cleaned dataset
- - Generates HTML report with embedded visualizations
+ - Generates HTML report with visualizations saved alongside as PNG files
 """
 
-import sys, os, io, base64
+import sys, os, re
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 import pandas as pd
+from pandas.api.types import is_bool_dtype, is_numeric_dtype
 import numpy as np
+import matplotlib
+matplotlib.use("Agg")  # render off-screen, no GUI event loop
 import matplotlib.pyplot as plt
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
 import seaborn as sns
 import tkinter as tk
 from tkinter import simpledialog
@@ -23,6 +29,8 @@ sns.set(style="whitegrid", rc={"figure.figsize": (8,5)})
 # ===== Settings =====
 MIN_COL_NONNA_RATIO = 0.05
 MAX_PAIRPLOT_COLS = 8
+MAX_ANNOTATED_HEATMAP_COLS = 20
+MAX_PLOT_ROWS = 20000
 OUTPUT_DIR = "auto_insights_output"
 
 # ===== Tkinter formula prompt =====
@@ -31,7 +39,7 @@ def ask_formula():
     root.withdraw()  # Hide main window
     formula = simpledialog.askstring(
         title="Custom Formula",
-        prompt="Enter a Python formula to add a new column.\nExample:\ndf['Total'] = df['Price'] * df['Quantity']"
+        prompt="Enter a formula to add a new column.\nExample:\nTotal = Price * Quantity"
     )
     root.destroy()
     return formula
@@ -39,82 +47,190 @@ def ask_formula():
 # ===== File handling =====
 def read_data(path):
     ext = path.lower().split('.')[-1]
+    # Prefer the Arrow CSV reader and the calamine Excel reader; both are
+    # optional, so fall back to the default engines when not installed
     if ext == "csv":
-        return pd.read_csv(path, low_memory=False)
+        try:
+            return pd.read_csv(path, engine="pyarrow")
+        except ImportError:
+            return pd.read_csv(path, low_memory=False)
     elif ext in ("xls", "xlsx"):
-        return pd.read_excel(path)
+        try:
+            return pd.read_excel(path, engine="calamine")
+        except ImportError:
+            return pd.read_excel(path)
     else:
         raise ValueError("Unsupported extension. Use .csv, .xls or .xlsx")
 
 def ensure_output_dir():
-    os.makedirs(OUTPUT_DIR, exist_ok=True)
+    if not os.path.isdir(OUTPUT_DIR):
+        os.makedirs(OUTPUT_DIR, exist_ok=True)
     return OUTPUT_DIR
 
-def save_fig_to_base64(plt):
-    buf = io.BytesIO()
+def save_fig_to_file(name):
     plt.tight_layout()
-    plt.savefig(buf, format='png', bbox_inches='tight')
+    plt.savefig(os.path.join(OUTPUT_DIR, name), format='png', bbox_inches='tight')
     plt.close()
-    buf.seek(0)
-    return base64.b64encode(buf.read()).decode('utf-8')
+    return name
 
 # ===== Cleaning =====
 def clean_dataframe(df):
-    df = df.replace(r'^\s*$', np.nan, regex=True)
+    # Blank strings only occur in columns holding strings; object columns with
+    # no strings (e.g. True/False/NaN) and numeric columns are left untouched
+    obj_cols = [c for c in df.select_dtypes(include=['object', 'string']).columns
+                if pd.api.types.infer_dtype(df[c], skipna=True) in ('string', 'mixed', 'mixed-integer')]
+    if obj_cols:
+        df[obj_cols] = df[obj_cols].apply(lambda s: s.mask(s.str.strip().eq('').fillna(False)))
     before_shape = df.shape
-    df = df.dropna(axis=1, how='all').dropna(axis=0, how='all')
-    df = df.drop_duplicates()
+    # Compute the not-null mask once and derive every drop from it
+    arr_notna = df.notna().to_numpy()
+    row_keep = arr_notna.any(axis=1)
+    col_keep = arr_notna.any(axis=0)
+    df = df.iloc[row_keep, col_keep]
+    uniq = ~df.duplicated().to_numpy()
+    df = df.iloc[uniq]
     thresh = int(MIN_COL_NONNA_RATIO * len(df))
     if thresh > 0:
-        df = df.dropna(axis=1, thresh=thresh)
+        nonna_counts = arr_notna[row_keep][:, col_keep][uniq].sum(axis=0)
+        df = df.iloc[:, nonna_counts >= thresh]
     after_shape = df.shape
     return df, before_shape, after_shape
 
+# ===== Formula =====
+def apply_formula(df, formula):
+    # "Name = expr" goes through df.eval (numexpr when installed); statements
+    # that use df directly, e.g. df['Total'] = df['Price'] * df['Quantity'],
+    # fall back to exec
+    name, sep, expr = formula.partition("=")
+    name = name.strip()
+    if sep and name.isidentifier() and not expr.startswith("="):
+        try:
+            df[name] = df.eval(expr)
+            return
+        except Exception:
+            if not re.search(r"\bdf\b", expr):
+                raise
+    columns_before = list(df.columns)
+    namespace = {"df": df, "np": np, "pd": pd}
+    exec(formula, namespace)
+    # Catch statements that bound a plain name (Total = df['Price'] * 2) or
+    # rebound df instead of assigning into the frame; checks names only, no data scan
+    stray = [k for k in namespace if k not in ("df", "np", "pd", "__builtins__")]
+    if namespace["df"] is not df:
+        raise ValueError("formula rebound df instead of modifying it; assign to df['Name'] instead")
+    if stray and list(df.columns) == columns_before:
+        raise ValueError(f"formula assigned {', '.join(stray)} instead of a df column")
+
 # ===== Insights =====
-def make_numeric_distribution_plots(num_df):
-    plots = {}
-    for col in num_df.columns:
-        fig, axes = plt.subplots(2, 1, figsize=(8,6), gridspec_kw={'height_ratios':[3,1]})
-        sns.histplot(num_df[col].dropna(), kde=True, ax=axes[0])
-        axes[0].set_title(f"Distribution: {col}")
-        sns.boxplot(x=num_df[col].dropna(), ax=axes[1])
-        plots[col] = save_fig_to_base64(plt)
-    return plots
-
-def make_categorical_barplots(cat_df):
-    plots = {}
-    for col in cat_df.columns:
-        top = cat_df[col].fillna("(missing)").value_counts().nlargest(10)
-        plt.figure(figsize=(8,4))
-        sns.barplot(x=top.values, y=top.index)
-        plt.title(f"Top categories: {col}")
-        plt.xlabel("Count")
-        plots[col] = save_fig_to_base64(plt)
-    return plots
-
-def make_correlation_heatmap(num_df):
+def summarize_columns(df, missing_counts):
+    # dtype, counts and descriptive stats for every column in a single pass
+    summary = {}
+    for col in df.columns:
+        col_series = df[col]
+        count = len(df) - missing_counts[col]
+        row = {"dtype": str(col_series.dtype), "count": count}
+        if count and is_numeric_dtype(col_series) and not is_bool_dtype(col_series):
+            vals = col_series.to_numpy(dtype=float, na_value=np.nan)
+            q25, q50, q75 = np.nanpercentile(vals, [25, 50, 75])
+            row.update(mean=np.nanmean(vals), std=np.nanstd(vals, ddof=1), min=np.nanmin(vals),
+                       q25=q25, q50=q50, q75=q75, max=np.nanmax(vals))
+        elif count:
+            row.update(unique=col_series.nunique(), top=col_series.mode().iloc[0])
+        summary[col] = row
+    summary = pd.DataFrame.from_dict(summary, orient='index')
+    if "unique" in summary:
+        # NaN for numeric rows would otherwise make the counts print as floats
+        summary["unique"] = summary["unique"].astype("Int64")
+    return summary
+
+# pyplot is not thread-safe, so the per-column renderers below each draw on
+# their own Figure and run in a thread pool
+def _save_figure(fig, name):
+    FigureCanvasAgg(fig)
+    fig.tight_layout()
+    fig.savefig(os.path.join(OUTPUT_DIR, name), format='png', bbox_inches='tight')
+    return name
+
+def _render_numeric(name, col, vals):
+    fig = Figure(figsize=(8,6))
+    axes = fig.subplots(2, 1, gridspec_kw={'height_ratios':[3,1]})
+    # Formulas can produce +/-inf (e.g. division by zero); histogram needs a finite range
+    vals = vals[np.isfinite(vals)]
+    counts, edges = np.histogram(vals, bins=50)
+    axes[0].bar(edges[:-1], counts, width=np.diff(edges), align='edge')
+    axes[0].set_title(f"Distribution: {col}")
+    axes[1].boxplot(vals, orientation='horizontal')
+    return _save_figure(fig, name)
+
+def _render_categorical(name, col, top):
+    fig = Figure(figsize=(8,4))
+    ax = fig.subplots()
+    ax.barh(top.index.astype(str), top.values)
+    ax.invert_yaxis()
+    ax.set_title(f"Top categories: {col}")
+    ax.set_xlabel("Count")
+    return _save_figure(fig, name)
+
+def make_numeric_distribution_plots(num_df, null_mask, prefix):
+    with ThreadPoolExecutor(max_workers=os.cpu_count()) as pool:
+        futures = {
+            col: pool.submit(_render_numeric, f"{prefix}num_{i}.png", col,
+                             num_df[col].to_numpy(dtype=float, na_value=np.nan)[~null_mask[col].to_numpy()])
+            for i, col in enumerate(num_df.columns)
+        }
+    return {col: f.result() for col, f in futures.items()}
+
+def make_categorical_barplots(topk, prefix):
+    with ThreadPoolExecutor(max_workers=os.cpu_count()) as pool:
+        futures = {
+            col: pool.submit(_render_categorical, f"{prefix}cat_{i}.png", col, top)
+            for i, (col, top) in enumerate(topk.items())
+        }
+    return {col: f.result() for col, f in futures.items()}
+
+def make_correlation_heatmap(num_df, null_mask, prefix):
     plt.figure(figsize=(8,6))
-    corr = num_df.corr()
-    sns.heatmap(corr, annot=True, fmt=".2f", cmap="RdBu", center=0)
+    if not null_mask[num_df.columns].to_numpy().any():
+        # No pairwise NaN handling needed, so a single corrcoef call suffices
+        arr = num_df.to_numpy(dtype=float)
+        corr = pd.DataFrame(np.corrcoef(arr, rowvar=False), index=num_df.columns, columns=num_df.columns)
+    else:
+        corr = num_df.corr()
+    if corr.shape[0] > MAX_ANNOTATED_HEATMAP_COLS:
+        # Wide matrices: a single image instead of one text artist per cell
+        ax = plt.gca()
+        im = ax.imshow(corr.values, cmap="RdBu", vmin=-1, vmax=1)
+        plt.colorbar(im, ax=ax)
+        ax.set_xticks(range(len(corr.columns)))
+        ax.set_xticklabels(corr.columns, rotation=90)
+        ax.set_yticks(range(len(corr.columns)))
+        ax.set_yticklabels(corr.columns)
+    else:
+        sns.heatmap(corr, annot=True, fmt=".2f", cmap="RdBu", center=0)
     plt.title("Correlation matrix")
-    return save_fig_to_base64(plt), corr
+    return save_fig_to_file(f"{prefix}corr.png"), corr
 
-def make_pairplot(num_df):
+def make_pairplot(num_df, prefix):
     cols = num_df.columns[:MAX_PAIRPLOT_COLS]
     if len(cols) < 2:
         return None
-    g = sns.pairplot(num_df[cols].dropna().sample(n=min(500, len(num_df)), random_state=1))
-    buf = io.BytesIO()
-    g.fig.savefig(buf, format='png', bbox_inches='tight')
+    # Sample before dropna so only a bounded subset is materialized
+    n = min(500, len(num_df))
+    sub = num_df[cols].sample(n=min(len(num_df), n * 3), random_state=1).dropna().head(n)
+    g = sns.pairplot(sub, diag_kind='hist', plot_kws={'s': 8, 'alpha': 0.5})
+    name = f"{prefix}pairplot.png"
+    g.fig.savefig(os.path.join(OUTPUT_DIR, name), format='png', bbox_inches='tight')
     plt.close('all')
-    buf.seek(0)
-    return base64.b64encode(buf.read()).decode('utf-8')
+    return name
 
 # ===== HTML Report =====
-def build_html_report(meta, col_info_html, missing_html, desc_html, topk_html,
-                      num_plots_b64, cat_plots_b64, corr_heat_b64, pairplot_b64):
-    now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    html = f"""
+def table_html(frame):
+    # Fixed float format and blank NaNs; data values are still HTML-escaped
+    return frame.to_html(float_format=lambda x: f'{x:.3f}', na_rep='')
+
+def build_html_report(meta, summary_html, missing_html, topk_html,
+                      num_plots, cat_plots, corr_heat_file, pairplot_file, now_str):
+    parts = [f"""
     <html><head>
       <meta charset="utf-8"/>
       <title>Auto Insights Report</title>
@@ -127,29 +243,32 @@ def build_html_report(meta, col_info_html, missing_html, desc_html, topk_html,
       </style>
     </head><body>
       <h1>Auto Insights Report</h1>
-      <p><b>Generated:</b> {now}</p>
+      <p><b>Generated:</b> {now_str}</p>
       <h2>Dataset Summary</h2>
       <pre>{meta}</pre>
-      <h2>Columns & Types</h2>{col_info_html}
+      <h2>Columns & Statistics</h2>{summary_html}
       <h2>Missing Values</h2>{missing_html}
-      <h2>Descriptive Statistics</h2>{desc_html}
       <h2>Top Categories</h2>{topk_html}
-    """
-    for col, b64 in num_plots_b64.items():
-        html += f"<h3>{col}</h3><img src='data:image/png;base64,{b64}' />"
-    html += "<h2>Categorical Plots</h2>"
-    for col, b64 in cat_plots_b64.items():
-        html += f"<h3>{col}</h3><img src='data:image/png;base64,{b64}' />"
-    if corr_heat_b64:
-        html += "<h2>Correlation Heatmap</h2><img src='data:image/png;base64,{corr_heat_b64}' />"
-    if pairplot_b64:
-        html += "<h2>Pairplot</h2><img src='data:image/png;base64,{pairplot_b64}' />"
-    html += "</body></html>"
-    return html
+    """]
+    for col, fname in num_plots.items():
+        parts.append(f"<h3>{col}</h3><img src='{fname}' />")
+    parts.append("<h2>Categorical Plots</h2>")
+    for col, fname in cat_plots.items():
+        parts.append(f"<h3>{col}</h3><img src='{fname}' />")
+    if corr_heat_file:
+        parts.append(f"<h2>Correlation Heatmap</h2><img src='{corr_heat_file}' />")
+    if pairplot_file:
+        parts.append(f"<h2>Pairplot</h2><img src='{pairplot_file}' />")
+    parts.append("</body></html>")
+    return "".join(parts)
 
 # ===== Main Pipeline =====
 def run_pipeline(input_path):
     outdir = ensure_output_dir()
+    now = datetime.now()
+    timestamp = now.strftime("%Y%m%d_%H%M%S")
+    now_str = now.strftime("%Y-%m-%d %H:%M:%S")
+    plot_prefix = f"plot_{timestamp}_"
     df = read_data(input_path)
     original_shape = df.shape
 
@@ -159,7 +278,7 @@ def run_pipeline(input_path):
     formula = ask_formula()
     if formula:
         try:
-            exec(formula, {"df": df, "np": np, "pd": pd})
+            apply_formula(df, formula)
             print("✅ Formula applied successfully.")
         except Exception as e:
             print(f"⚠ Error applying formula: {e}")
@@ -167,23 +286,36 @@ def run_pipeline(input_path):
     numeric_df = df.select_dtypes(include=[np.number])
     categorical_df = df.select_dtypes(exclude=[np.number])
 
+    null_mask = df.isna()
+    missing_counts = null_mask.sum()
+
+    # Plots only need a sample; stats and correlations use the full frame
+    plot_df = df if len(df) <= MAX_PLOT_ROWS else df.sample(MAX_PLOT_ROWS, random_state=0)
+    plot_null_mask = null_mask if plot_df is df else null_mask.loc[plot_df.index]
+    numeric_plot_df = plot_df.select_dtypes(include=[np.number])
+
     meta = f"Original: {original_shape}\nAfter cleaning: {after_shape}"
-    col_info_html = df.dtypes.to_frame("dtype").to_html()
-    missing_html = df.isnull().sum().to_frame("missing_count").assign(missing_pct=lambda x: (x["missing_count"]/len(df)).round(3)).to_html()
-    desc_html = df.describe(include='all').transpose().to_html()
-    topk_html = "".join([f"<h4>{c}</h4>{categorical_df[c].fillna('(missing)').value_counts().head(10).to_frame('count').to_html()}" for c in categorical_df.columns])
+    missing_pct = (missing_counts / len(df)).round(3)
+    missing_html = table_html(pd.DataFrame({"missing_count": missing_counts, "missing_pct": missing_pct}))
+    summary_html = table_html(summarize_columns(df, missing_counts))
+    # Top categories are counted once and shared by the tables and the bar plots
+    topk = {c: categorical_df[c].fillna('(missing)').value_counts().nlargest(10) for c in categorical_df.columns}
+    topk_html = table_html(pd.concat(topk, names=["column", "value"]).to_frame("count")) if topk else ""
 
-    num_plots_b64 = make_numeric_distribution_plots(numeric_df) if not numeric_df.empty else {}
-    cat_plots_b64 = make_categorical_barplots(categorical_df) if not categorical_df.empty else {}
-    corr_b64, _ = make_correlation_heatmap(numeric_df) if numeric_df.shape[1] > 1 else (None, None)
-    pairplot_b64 = make_pairplot(numeric_df) if not numeric_df.empty else None
+    num_plots = make_numeric_distribution_plots(numeric_plot_df, plot_null_mask, plot_prefix) if not numeric_plot_df.empty else {}
+    cat_plots = make_categorical_barplots(topk, plot_prefix) if topk else {}
+    corr_file, _ = make_correlation_heatmap(numeric_df, null_mask, plot_prefix) if numeric_df.shape[1] > 1 else (None, None)
+    pairplot_file = make_pairplot(numeric_df, plot_prefix) if not numeric_df.empty else None
 
-    html = build_html_report(meta, col_info_html, missing_html, desc_html, topk_html,
-                             num_plots_b64, cat_plots_b64, corr_b64, pairplot_b64)
+    html = build_html_report(meta, summary_html, missing_html, topk_html,
+                             num_plots, cat_plots, corr_file, pairplot_file, now_str)
 
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
     df.to_csv(os.path.join(outdir, f"cleaned_data_{timestamp}.csv"), index=False)
-    df.to_excel(os.path.join(outdir, f"cleaned_data_{timestamp}.xlsx"), index=False)
+    xlsx_path = os.path.join(outdir, f"cleaned_data_{timestamp}.xlsx")
+    try:
+        df.to_excel(xlsx_path, index=False, engine="xlsxwriter")
+    except ImportError:
+        df.to_excel(xlsx_path, index=False)
     with open(os.path.join(outdir, f"insights_report_{timestamp}.html"), "w", encoding="utf-8") as f:
         f.write(html)
 
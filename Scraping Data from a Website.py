@@ -1,40 +1,46 @@
-from bs4 import BeautifulSoup
+from selectolax.lexbor import LexborHTMLParser
 import requests
+from requests.adapters import HTTPAdapter
 import pandas as pd
 
 url = 'https://www.scrapethissite.com/pages/forms/'
 
-page = requests.get(url)
+# One session for every page so the connection is reused
+session = requests.Session()
+session.headers['Accept-Encoding'] = 'gzip, deflate'
+session.mount('https://', HTTPAdapter(pool_connections=10, pool_maxsize=10))
 
-soup = BeautifulSoup(page.text, 'html')
+table_title_data = None
+rows_data = []
 
-table = soup.find_all('th')
+for page_num in range(1, 25):
+    page = session.get(url, params={'page_num': page_num}, timeout=10)
 
+    # Parse the raw bytes directly, no need to decode to text first
+    tree = LexborHTMLParser(page.content)
 
-table_title_data = [title.text.strip() for title  in table]
-print(table)
+    # Only the table is scraped, so scope every query to it
+    table_node = tree.css_first('table')
 
-df = pd.DataFrame(columns = table)
+    if table_title_data is None:
+        table = table_node.css('th')
+        table_title_data = [title.text(strip=True) for title  in table]
+        print(table)
 
-column_data = soup.find_all('td')
+    # Extracting rows from the HTML
+    rows = table_node.css('tr')[1:]  # Skip the header row
 
+    for row in rows:
+        row_data = row.css('td')
+        individual_row_data = [data.text(strip=True) for data in row_data]
+        
+        # Adjust the row length to match DataFrame columns
+        adjusted_row_data = individual_row_data[:len(table_title_data)] + [None] * (len(table_title_data) - len(individual_row_data))
+        
+        rows_data.append(adjusted_row_data)
 
-# Assuming 'table' contains the column names
-df = pd.DataFrame(columns=table)
-
-# Extracting rows from the HTML
-rows = soup.find_all('tr')[1:]  # Skip the header row
-
-for row in rows:
-    row_data = row.find_all('td')
-    individual_row_data = [data.text.strip() for data in row_data]
-    
-    # Adjust the row length to match DataFrame columns
-    adjusted_row_data = individual_row_data[:len(df.columns)] + [None] * (len(df.columns) - len(individual_row_data))
-    
-    # Add adjusted row to the DataFrame
-    length = len(df)
-    df.loc[length] = adjusted_row_data
+# Build the DataFrame once from all collected rows
+df = pd.DataFrame(rows_data, columns=table_title_data)
 
 
 